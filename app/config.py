@@ -9,7 +9,16 @@ class Settings(BaseSettings):
     REDIS_URL: str = "redis://localhost:6379"
     CDN_DOMAIN: str
     STATIC_IMAGES_DIR: str = "static/images"
+    STORAGE_BACKEND: str = "local"
+    STORAGE_SHARD_DEPTH: int = 2
+    RECONCILE_GRACE_SECONDS: int = 3600
+    DOWNLOAD_TIMEOUT: int = 30
     API_KEYS_COLLECTION: str
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF: int = 5
+    JOB_RESULT_TTL: int = 604800
+    JOB_HEARTBEAT_TTL: int = 30
+    STATS_RECOMPUTE_INTERVAL: int = 300
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
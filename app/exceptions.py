@@ -24,4 +24,8 @@ class RateLimitExceededException(APIException):
 
 class UserNotAuthorizedException(APIException):
     def __init__(self, message: str = "User does not have the required permissions") -> None:
-        super().__init__(message)
\ No newline at end of file
+        super().__init__(message)
+
+class NonRetryableJobException(APIException):
+    def __init__(self, message: str = "Job failed permanently") -> None:
+        super().__init__(message)
@@ -2,7 +2,7 @@ from fastapi import FastAPI, Request, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 from contextlib import asynccontextmanager
-from app.routes import auth, images, stats
+from app.routes import auth, images, jobs, stats
 from pymongo.errors import PyMongoError
 from app.config import settings
 import os
@@ -54,6 +54,7 @@ app.add_middleware(
 app.include_router(stats.router, prefix="/v1")
 app.include_router(auth.router, prefix="/v1/auth")
 app.include_router(images.router, prefix="/v1/img")
+app.include_router(jobs.router, prefix="/v1/jobs")
 
 @app.get("/favicon.ico", include_in_schema=False)
 async def custom_favicon():
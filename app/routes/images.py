@@ -4,17 +4,15 @@ from app.exceptions import UserNotAuthorizedException
 from app.models import ImageCreate, ImageUpdate
 from app.utils.security import verify_api_key
 from app.utils.rate_limiter import rate_limit
-from app.utils.cdn import save_image_locally
-from nudenet import NudeDetector
+from app.utils.storage import storage, key_from_url
+from app.utils.jobs import enqueue
 from app.config import settings
+from redis.exceptions import RedisError
 from bson import ObjectId
 import asyncio
-import os
 
 router = APIRouter()
 
-detector = NudeDetector()
-
 def get_db(request: Request):
     return request.app.state.db
 
@@ -128,7 +126,7 @@ async def get_random(
         "items": items
     }
 
-@router.post("/", summary="Post a new image", tags=["Images"])
+@router.post("/", status_code=status.HTTP_202_ACCEPTED, summary="Post a new image", tags=["Images"])
 @rate_limit
 async def post_image(
         request: Request,
@@ -136,34 +134,14 @@ async def post_image(
         user: dict = Depends(verify_api_key),
         collection=Depends(get_images_collection)
 ) -> dict:
-    image_data = image.model_dump()
+    image_data = image.model_dump(mode="json")
     category = image_data.get("category")
     if not category:
         raise HTTPException(status_code=400, detail="Category is required.")
 
-    try:
-        local_url = save_image_locally(str(image_data["url"]), category)
-    except HTTPException as e:
-        raise e
-
-    file_path = os.path.join(os.getcwd(), settings.STATIC_IMAGES_DIR, local_url.lstrip("/"))
-
-    try:
-        detections = detector.detect(file_path)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error classifying image: {e}")
-
-    is_nsfw = any(d.get("confidence", 0) > 0.5 for d in detections)
-    image_data["is_nsfw"] = is_nsfw
-
-    image_data["url"] = settings.CDN_DOMAIN.rstrip("/") + "/images" + local_url.replace("/static", "")
-
-    result_db = await collection.insert_one(image_data)
-    if result_db.inserted_id:
-        image_data["_id"] = result_db.inserted_id
-        return {"detail": "Image added successfully.", "image": fix_mongo_document(image_data)}
-
-    raise HTTPException(status_code=500, detail="Error inserting the image into the database.")
+    url = image_data.pop("url")
+    job = await enqueue("process_image", {"url": url, "category": category, "data": image_data})
+    return {"detail": "Image queued for processing.", "job": job}
 
 @router.put("/{image_id}", summary="Update an existing image", tags=["Images"])
 @rate_limit
@@ -186,19 +164,23 @@ async def update_image(
     existing_image = await collection.find_one({"_id": obj_id})
     if not existing_image:
         raise HTTPException(status_code=404, detail="Image not found.")
-    update_data = image_update.model_dump(exclude_unset=True)
-    if "url" in update_data:
-        try:
-            new_category = update_data.get("category", existing_image.get("category"))
-            local_url = save_image_locally(str(update_data["url"]), new_category)
-            update_data["url"] = local_url
-        except HTTPException as e:
-            raise e
-    result = await collection.update_one({"_id": obj_id}, {"$set": update_data})
-    if result.modified_count == 0:
+    update_data = image_update.model_dump(mode="json", exclude_unset=True)
+    new_url = update_data.pop("url", None)
+    modified = False
+    if update_data:
+        result = await collection.update_one({"_id": obj_id}, {"$set": update_data})
+        modified = result.modified_count > 0
+    if not modified and not new_url:
         raise HTTPException(status_code=500, detail="No changes made to the image.")
+    response = {"detail": "Image updated successfully."}
+    if new_url:
+        new_category = update_data.get("category", existing_image.get("category"))
+        response["job"] = await enqueue(
+            "process_image", {"url": new_url, "category": new_category, "image_id": image_id}
+        )
     updated_image = await collection.find_one({"_id": obj_id})
-    return {"detail": "Image updated successfully.", "image": fix_mongo_document(updated_image)}
+    response["image"] = fix_mongo_document(updated_image)
+    return response
 
 @router.delete("/{image_id}", summary="Delete an existing image", tags=["Images"])
 @rate_limit
@@ -223,12 +205,13 @@ async def delete_image(
     result = await collection.delete_one({"_id": obj_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Image not found.")
-    local_url = image_doc.get("url")
-    if local_url:
-        file_path = os.path.join(os.getcwd(), settings.STATIC_IMAGES_DIR, local_url.lstrip("/"))
+    key = image_doc.get("path") or key_from_url(image_doc.get("url") or "")
+    if key:
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error deleting image file: {e}")
+            await enqueue("delete_file", {"key": key})
+        except RedisError:
+            try:
+                await asyncio.to_thread(storage.delete, key)
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=f"Error deleting image file: {e}")
     return {"detail": "Image deleted successfully."}
\ No newline at end of file
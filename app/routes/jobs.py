@@ -0,0 +1,79 @@
+from fastapi import APIRouter, HTTPException, Query, Request, Depends, status, Path
+from app.utils.jobs import enqueue, get_job, list_jobs, cancel_job
+from app.exceptions import UserNotAuthorizedException
+from app.utils.security import verify_api_key
+from app.utils.rate_limiter import rate_limit
+from app.utils.helpers import is_authorized
+
+router = APIRouter()
+
+def require_admin(user: dict, action: str) -> None:
+    if not is_authorized(user, "admin"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=str(UserNotAuthorizedException(f"User is not authorized to {action}."))
+        )
+
+@router.get("/", summary="List background jobs", tags=["Jobs"])
+@rate_limit
+async def get_jobs(
+    request: Request,
+    job_status: str = Query(None, alias="status", description="Filter by job status"),
+    job_type: str = Query(None, alias="type", description="Filter by job type"),
+    page: int = Query(1, ge=1, description="Page number"),
+    size: int = Query(20, ge=1, le=100, description="Number of jobs per page"),
+    user: dict = Depends(verify_api_key)
+) -> dict:
+    require_admin(user, "list jobs")
+    try:
+        return await list_jobs(status=job_status, job_type=job_type, page=page, size=size)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.post(
+    "/reconcile",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue a storage reconciliation job",
+    tags=["Jobs"]
+)
+@rate_limit
+async def queue_reconcile(
+    request: Request,
+    category: str = Query(None, description="Only reconcile a single category"),
+    fix: bool = Query(False, description="Delete orphaned files and dangling documents"),
+    user: dict = Depends(verify_api_key)
+) -> dict:
+    require_admin(user, "queue jobs")
+    job = await enqueue("reconcile_storage", {"category": category, "fix": fix}, max_attempts=1)
+    return {"detail": "Reconciliation queued.", "job": job}
+
+@router.get("/{job_id}", summary="Retrieve a background job", tags=["Jobs"])
+@rate_limit
+async def get_job_by_id(
+    request: Request,
+    job_id: str = Path(..., description="The ID of the job"),
+    user: dict = Depends(verify_api_key)
+) -> dict:
+    require_admin(user, "inspect jobs")
+    job = await get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+@router.delete("/{job_id}", summary="Cancel a pending background job", tags=["Jobs"])
+@rate_limit
+async def delete_job(
+    request: Request,
+    job_id: str = Path(..., description="The ID of the job to cancel"),
+    user: dict = Depends(verify_api_key)
+) -> dict:
+    require_admin(user, "cancel jobs")
+    result = await cancel_job(job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if result != "cancelled":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job cannot be cancelled in status '{result}'."
+        )
+    return {"detail": "Job cancelled successfully.", "job": await get_job(job_id)}
@@ -3,8 +3,9 @@ from app.exceptions import UserNotAuthorizedException
 from app.utils.security import verify_api_key
 from app.utils.rate_limiter import rate_limit
 from app.utils.helpers import is_authorized
+from app.utils.jobs import enqueue, get_queue_stats
+from redis.exceptions import RedisError
 from app.config import settings
-import asyncio
 import psutil
 import time
 import os
@@ -57,12 +58,12 @@ async def get_status(request: Request, user: dict = Depends(verify_api_key)):
         uptime_seconds = time.time() - psutil.Process().create_time()
 
         db = request.app.state.db
-        total_users_future = db[settings.API_KEYS_COLLECTION].count_documents({})
-        total_images_future = db[settings.IMAGES_COLLECTION].count_documents({})
-        total_users, total_images = await asyncio.gather(total_users_future, total_images_future)
-
-        stats_doc = await db["stats"].find_one({"_id": "global"})
-        total_requests = stats_doc.get("totalRequests", 0) if stats_doc else 0
+        stats_doc = await db["stats"].find_one({"_id": "global"}) or {}
+        total_requests = stats_doc.get("totalRequests", 0)
+        stats_updated_at = stats_doc.get("statsUpdatedAt")
+        # Totals are only reported once a recompute_stats job has counted them.
+        total_users = stats_doc.get("totalUsers") if stats_updated_at else None
+        total_images = stats_doc.get("totalImages") if stats_updated_at else None
 
     except Exception as e:
         raise HTTPException(
@@ -70,6 +71,13 @@ async def get_status(request: Request, user: dict = Depends(verify_api_key)):
             detail=f"Error retrieving system metrics: {e}"
         )
 
+    try:
+        job_stats = await get_queue_stats()
+        if not stats_updated_at or time.time() - stats_updated_at > settings.STATS_RECOMPUTE_INTERVAL:
+            await enqueue("recompute_stats", {}, unique_for=settings.STATS_RECOMPUTE_INTERVAL)
+    except RedisError:
+        job_stats = None
+
     return {
         "cpu_usage": cpu_usage,
         "cpu_count": cpu_count,
@@ -87,8 +95,10 @@ async def get_status(request: Request, user: dict = Depends(verify_api_key)):
         "globalStats": {
             "totalRequests": total_requests,
             "totalUsers": total_users,
-            "totalImages": total_images
+            "totalImages": total_images,
+            "updatedAt": stats_updated_at
         },
+        "jobs": job_stats,
         "timestamp": time.time(),
         "uptime": uptime_seconds
     }
\ No newline at end of file
@@ -1,6 +1,6 @@
+from app.utils.storage import storage, shard_key
 from fastapi import HTTPException
 from app.config import settings
-from pathlib import Path
 import requests
 import uuid
 
@@ -24,21 +24,20 @@ def get_extension(image_url: str, content_type: str) -> str:
 
 def save_image_locally(image_url: str, category: str) -> str:
     try:
-        response = requests.get(image_url)
+        response = requests.get(image_url, timeout=settings.DOWNLOAD_TIMEOUT)
         response.raise_for_status()
     except requests.RequestException as e:
-        raise HTTPException(status_code=400, detail=f"Error downloading the image: {e}")
+        upstream_status = e.response.status_code if e.response is not None else None
+        status_code = 400 if upstream_status and 400 <= upstream_status < 500 else 502
+        raise HTTPException(status_code=status_code, detail=f"Error downloading the image: {e}")
 
     extension = get_extension(image_url, response.headers.get("Content-Type", ""))
     filename = f"{uuid.uuid4()}.{extension}"
-
-    category_dir = Path(settings.STATIC_IMAGES_DIR) / category
-    category_dir.mkdir(parents=True, exist_ok=True)
-    file_path = category_dir / filename
+    key = shard_key(category, filename)
 
     try:
-        file_path.write_bytes(response.content)
+        storage.save(key, response.content)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error saving the image: {e}")
 
-    return f"/{category}/{filename}"
\ No newline at end of file
+    return f"/{key}"
\ No newline at end of file
@@ -0,0 +1,340 @@
+from app.exceptions import NonRetryableJobException
+from typing import Any, Dict, List, Optional
+from app.utils.tasks import handlers
+from app.config import settings
+import redis.asyncio as redis
+import json
+import time
+import uuid
+
+redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+JOB_PREFIX = "job:"
+STATUS_PREFIX = "jobs:status:"
+TYPE_PREFIX = "jobs:type:"
+PROCESSING_PREFIX = "jobs:processing:"
+HEARTBEAT_PREFIX = "jobs:worker:"
+UNIQUE_PREFIX = "jobs:unique:"
+QUEUE_KEY = "jobs:queue"
+INDEX_KEY = "jobs:index"
+WORKERS_KEY = "jobs:workers"
+WAIT_TIMES_KEY = "jobs:latency:wait"
+RUN_TIMES_KEY = "jobs:latency:run"
+LATENCY_SAMPLES = 1000
+PROMOTE_BATCH = 100
+PRUNE_BATCH = 1000
+
+STATUSES = ("queued", "delayed", "running", "succeeded", "failed", "cancelled")
+PENDING_STATUSES = ("queued", "delayed")
+FINAL_STATUSES = ("succeeded", "failed", "cancelled")
+
+# Every status change goes through one of these scripts so that the current
+# status is checked and updated atomically. Job ids live in exactly one
+# "jobs:status:<status>" sorted set; for "delayed" the score is the retry time.
+_SET_STATUS = """
+local function set_status(id, old, new, score)
+    redis.call('ZREM', 'jobs:status:' .. old, id)
+    redis.call('ZADD', 'jobs:status:' .. new, score, id)
+    redis.call('HSET', 'job:' .. id, 'status', new)
+end
+"""
+
+_CLAIM_SCRIPT = _SET_STATUS + """
+local id, now, worker = ARGV[1], ARGV[2], ARGV[3]
+local key = 'job:' .. id
+if redis.call('HGET', key, 'status') ~= 'queued' then
+    redis.call('LREM', KEYS[1], 0, id)
+    return 0
+end
+redis.call('HINCRBY', key, 'attempts', 1)
+redis.call('HSET', key, 'started_at', now, 'worker', worker)
+set_status(id, 'queued', 'running', now)
+return 1
+"""
+
+_FINISH_SCRIPT = _SET_STATUS + """
+local id, outcome, now, ttl, run_at, field, value = ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5], ARGV[6], ARGV[7]
+local key = 'job:' .. id
+if redis.call('LREM', KEYS[1], 0, id) == 0 or redis.call('HGET', key, 'status') ~= 'running' then
+    return 0
+end
+redis.call('HDEL', key, 'error', 'result')
+redis.call('HSET', key, field, value)
+if outcome == 'delayed' then
+    redis.call('HSET', key, 'run_at', run_at)
+    set_status(id, 'running', 'delayed', run_at)
+else
+    redis.call('HSET', key, 'finished_at', now)
+    set_status(id, 'running', outcome, now)
+    redis.call('EXPIRE', key, ttl)
+end
+return 1
+"""
+
+_CANCEL_SCRIPT = _SET_STATUS + """
+local id, now, ttl = ARGV[1], ARGV[2], ARGV[3]
+local key = 'job:' .. id
+local status = redis.call('HGET', key, 'status')
+if status ~= 'queued' and status ~= 'delayed' then
+    return status
+end
+redis.call('LREM', KEYS[1], 0, id)
+redis.call('HSET', key, 'finished_at', now)
+set_status(id, status, 'cancelled', now)
+redis.call('EXPIRE', key, ttl)
+return 'cancelled'
+"""
+
+_PROMOTE_SCRIPT = _SET_STATUS + """
+local now, limit = ARGV[1], ARGV[2]
+local ids = redis.call('ZRANGEBYSCORE', 'jobs:status:delayed', 0, now, 'LIMIT', 0, limit)
+for _, id in ipairs(ids) do
+    set_status(id, 'delayed', 'queued', now)
+    redis.call('LPUSH', KEYS[1], id)
+end
+return #ids
+"""
+
+_REAP_SCRIPT = _SET_STATUS + """
+local worker, now, ttl, backoff = ARGV[1], ARGV[2], ARGV[3], ARGV[4]
+local ids = redis.call('LRANGE', KEYS[1], 0, -1)
+for _, id in ipairs(ids) do
+    local key = 'job:' .. id
+    local status = redis.call('HGET', key, 'status')
+    if status == 'running' then
+        local attempts = tonumber(redis.call('HGET', key, 'attempts') or '0')
+        local max_attempts = tonumber(redis.call('HGET', key, 'max_attempts') or '1')
+        redis.call('HSET', key, 'error', 'Worker ' .. worker .. ' stopped while running the job.')
+        if attempts < max_attempts then
+            local run_at = tonumber(now) + tonumber(backoff)
+            redis.call('HSET', key, 'run_at', run_at)
+            set_status(id, 'running', 'delayed', run_at)
+        else
+            redis.call('HSET', key, 'finished_at', now)
+            set_status(id, 'running', 'failed', now)
+            redis.call('EXPIRE', key, ttl)
+        end
+    elseif status == 'queued' then
+        redis.call('RPUSH', KEYS[2], id)
+    end
+end
+redis.call('DEL', KEYS[1])
+redis.call('SREM', KEYS[3], worker)
+return #ids
+"""
+
+def _job_key(job_id: str) -> str:
+    return f"{JOB_PREFIX}{job_id}"
+
+def _processing_key(worker_id: str) -> str:
+    return f"{PROCESSING_PREFIX}{worker_id}"
+
+def _decode_job(raw: Dict[str, str]) -> Dict[str, Any]:
+    job: Dict[str, Any] = dict(raw)
+    for field in ("payload", "result"):
+        job[field] = json.loads(raw[field]) if raw.get(field) else None
+    for field in ("attempts", "max_attempts"):
+        job[field] = int(raw.get(field, 0))
+    for field in ("created_at", "started_at", "finished_at", "run_at"):
+        job[field] = float(raw[field]) if raw.get(field) else None
+    return job
+
+async def enqueue(
+    job_type: str,
+    payload: Dict[str, Any],
+    max_attempts: Optional[int] = None,
+    unique_for: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    if job_type not in handlers:
+        raise ValueError(f"Unknown job type: {job_type}")
+    if unique_for and not await redis_client.set(f"{UNIQUE_PREFIX}{job_type}", 1, nx=True, ex=unique_for):
+        return None
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    job = {
+        "id": job_id,
+        "type": job_type,
+        "payload": json.dumps(payload),
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": max_attempts or settings.JOB_MAX_ATTEMPTS,
+        "created_at": now,
+        "run_at": now,
+    }
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.hset(_job_key(job_id), mapping=job)
+        pipe.zadd(INDEX_KEY, {job_id: now})
+        pipe.zadd(f"{TYPE_PREFIX}{job_type}", {job_id: now})
+        pipe.zadd(f"{STATUS_PREFIX}queued", {job_id: now})
+        pipe.lpush(QUEUE_KEY, job_id)
+        await pipe.execute()
+    return _decode_job({k: str(v) for k, v in job.items()})
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    raw = await redis_client.hgetall(_job_key(job_id))
+    return _decode_job(raw) if raw else None
+
+async def list_jobs(
+    status: Optional[str] = None, job_type: Optional[str] = None, page: int = 1, size: int = 20
+) -> Dict[str, Any]:
+    if status and status not in STATUSES:
+        raise ValueError(f"Unknown job status: {status}")
+    if job_type and job_type not in handlers:
+        raise ValueError(f"Unknown job type: {job_type}")
+    if status and job_type:
+        key = f"jobs:filter:{uuid.uuid4().hex}"
+        await redis_client.zinterstore(
+            key, {f"{STATUS_PREFIX}{status}": 0, f"{TYPE_PREFIX}{job_type}": 1}
+        )
+        await redis_client.expire(key, 60)
+    elif status:
+        key = f"{STATUS_PREFIX}{status}"
+    elif job_type:
+        key = f"{TYPE_PREFIX}{job_type}"
+    else:
+        key = INDEX_KEY
+
+    skip = (page - 1) * size
+    total = await redis_client.zcard(key)
+    job_ids = await redis_client.zrevrange(key, skip, skip + size - 1)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for job_id in job_ids:
+            pipe.hgetall(_job_key(job_id))
+        raws = await pipe.execute()
+
+    jobs = [_decode_job(raw) for raw in raws if raw]
+    expired = [job_id for job_id, raw in zip(job_ids, raws) if not raw]
+    if expired:
+        await redis_client.zrem(INDEX_KEY, *expired)
+        await redis_client.zrem(key, *expired)
+
+    return {
+        "page": page,
+        "size": size,
+        "total": total - len(expired),
+        "items": jobs
+    }
+
+async def cancel_job(job_id: str) -> Optional[str]:
+    return await redis_client.eval(
+        _CANCEL_SCRIPT, 1, QUEUE_KEY, job_id, time.time(), settings.JOB_RESULT_TTL
+    )
+
+async def promote_delayed_jobs() -> int:
+    return await redis_client.eval(_PROMOTE_SCRIPT, 1, QUEUE_KEY, time.time(), PROMOTE_BATCH)
+
+async def register_worker(worker_id: str) -> None:
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.sadd(WORKERS_KEY, worker_id)
+        pipe.set(f"{HEARTBEAT_PREFIX}{worker_id}", time.time(), ex=settings.JOB_HEARTBEAT_TTL)
+        await pipe.execute()
+
+async def release_worker_jobs(worker_id: str) -> int:
+    return await redis_client.eval(
+        _REAP_SCRIPT, 3, _processing_key(worker_id), QUEUE_KEY, WORKERS_KEY,
+        worker_id, time.time(), settings.JOB_RESULT_TTL, settings.JOB_RETRY_BACKOFF
+    )
+
+async def reap_dead_workers() -> int:
+    reaped = 0
+    for worker_id in await redis_client.smembers(WORKERS_KEY):
+        if await redis_client.exists(f"{HEARTBEAT_PREFIX}{worker_id}"):
+            continue
+        reaped += await release_worker_jobs(worker_id)
+    return reaped
+
+async def prune_expired_jobs() -> int:
+    cutoff = time.time() - settings.JOB_RESULT_TTL
+    for status in FINAL_STATUSES:
+        await redis_client.zremrangebyscore(f"{STATUS_PREFIX}{status}", 0, cutoff)
+
+    job_ids = await redis_client.zrangebyscore(INDEX_KEY, 0, cutoff, start=0, num=PRUNE_BATCH)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for job_id in job_ids:
+            pipe.exists(_job_key(job_id))
+        exists = await pipe.execute()
+    expired = [job_id for job_id, found in zip(job_ids, exists) if not found]
+    if expired:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zrem(INDEX_KEY, *expired)
+            for job_type in handlers:
+                pipe.zrem(f"{TYPE_PREFIX}{job_type}", *expired)
+            await pipe.execute()
+    return len(expired)
+
+async def _finish(
+    worker_id: str, job_id: str, outcome: str, field: str, value: str, run_at: float = 0
+) -> bool:
+    return bool(await redis_client.eval(
+        _FINISH_SCRIPT, 1, _processing_key(worker_id),
+        job_id, outcome, time.time(), settings.JOB_RESULT_TTL, run_at, field, value
+    ))
+
+async def run_next_job(db: Any, worker_id: str, timeout: int = 5) -> Optional[Dict[str, Any]]:
+    job_id = await redis_client.blmove(QUEUE_KEY, _processing_key(worker_id), timeout, "RIGHT", "LEFT")
+    if not job_id:
+        return None
+    try:
+        return await _run_job(db, worker_id, job_id)
+    except BaseException:
+        # The job is still in this worker's processing list: hand it back
+        # instead of leaving it "running" until the worker restarts.
+        try:
+            await release_worker_jobs(worker_id)
+        except Exception:
+            pass
+        raise
+
+async def _run_job(db: Any, worker_id: str, job_id: str) -> Optional[Dict[str, Any]]:
+    claimed = await redis_client.eval(_CLAIM_SCRIPT, 1, _processing_key(worker_id), job_id, time.time(), worker_id)
+    job = await get_job(job_id)
+    if not claimed or not job:
+        return job
+
+    started_at = job["started_at"]
+    try:
+        handler = handlers.get(job["type"])
+        if handler is None:
+            raise NonRetryableJobException(f"Unknown job type: {job['type']}")
+        result = await handler(db, job["payload"] or {})
+    except Exception as e:
+        error = e.message if isinstance(e, NonRetryableJobException) else str(e)
+        if isinstance(e, NonRetryableJobException) or job["attempts"] >= job["max_attempts"]:
+            await _finish(worker_id, job_id, "failed", "error", error)
+        else:
+            run_at = time.time() + settings.JOB_RETRY_BACKOFF * 2 ** (job["attempts"] - 1)
+            await _finish(worker_id, job_id, "delayed", "error", error, run_at)
+        return await get_job(job_id)
+
+    finished_at = time.time()
+    if await _finish(worker_id, job_id, "succeeded", "result", json.dumps(result or {})):
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.lpush(WAIT_TIMES_KEY, started_at - (job["run_at"] or job["created_at"]))
+            pipe.ltrim(WAIT_TIMES_KEY, 0, LATENCY_SAMPLES - 1)
+            pipe.lpush(RUN_TIMES_KEY, finished_at - started_at)
+            pipe.ltrim(RUN_TIMES_KEY, 0, LATENCY_SAMPLES - 1)
+            await pipe.execute()
+    return await get_job(job_id)
+
+async def get_queue_stats() -> Dict[str, Any]:
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.llen(QUEUE_KEY)
+        pipe.zcard(f"{STATUS_PREFIX}delayed")
+        pipe.zcard(f"{STATUS_PREFIX}running")
+        pipe.scard(WORKERS_KEY)
+        pipe.lrange(WAIT_TIMES_KEY, 0, -1)
+        pipe.lrange(RUN_TIMES_KEY, 0, -1)
+        queued, delayed, running, workers, wait_times, run_times = await pipe.execute()
+
+    def average(samples: List[str]) -> Optional[float]:
+        values = [float(s) for s in samples]
+        return round(sum(values) / len(values), 3) if values else None
+
+    return {
+        "queued": queued,
+        "delayed": delayed,
+        "running": running,
+        "workers": workers,
+        "avg_wait_seconds": average(wait_times),
+        "avg_run_seconds": average(run_times)
+    }
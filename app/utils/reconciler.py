@@ -0,0 +1,179 @@
+from app.utils.storage import StorageBackend, storage, key_from_url, url_from_key, shard_key
+from motor.motor_asyncio import AsyncIOMotorClient
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+import argparse
+import asyncio
+import json
+import re
+import time
+
+BATCH_SIZE = 1000
+
+def _document_key(doc: Dict[str, Any]) -> str:
+    return doc.get("path") or key_from_url(doc.get("url") or "")
+
+def _key_filter(key: str) -> Dict[str, Any]:
+    urls = [url_from_key(key), f"/{key}", key]
+    return {"$or": [{"path": key}, {"path": None, "url": {"$in": urls}}]}
+
+def _scan_storage(backend: StorageBackend, category: Optional[str]) -> Dict[str, Tuple[int, float]]:
+    return {key: (size, mtime) for key, size, mtime in backend.iter_files(category)}
+
+async def _iter_documents(collection: Any, category: Optional[str]):
+    query: Dict[str, Any] = {}
+    if category:
+        query = {"$or": [{"path": {"$regex": f"^{re.escape(category)}/"}}, {"path": None}]}
+    cursor = collection.find(query, {"path": 1, "url": 1}).batch_size(BATCH_SIZE)
+    async for doc in cursor:
+        key = _document_key(doc)
+        if category and key and not key.startswith(f"{category}/"):
+            continue
+        yield key, doc
+
+async def _load_document_keys(
+    collection: Any, category: Optional[str]
+) -> Tuple[Dict[str, List[Any]], List[Any]]:
+    keys: Dict[str, List[Any]] = {}
+    unresolved: List[Any] = []
+    async for key, doc in _iter_documents(collection, category):
+        if not key:
+            unresolved.append(doc["_id"])
+            continue
+        keys.setdefault(key, []).append(doc["_id"])
+    return keys, unresolved
+
+async def migrate_storage(
+    db: Any,
+    *,
+    category: Optional[str] = None,
+    backend: StorageBackend = storage
+) -> Dict[str, Any]:
+    collection = db[settings.IMAGES_COLLECTION]
+    migrated = 0
+    missing: List[str] = []
+    skipped: List[str] = []
+    async for key, doc in _iter_documents(collection, category):
+        if not key:
+            continue
+        parts = key.split("/")
+        new_key = shard_key(parts[0], parts[-1])
+        if new_key == key:
+            continue
+        moved = False
+        if await asyncio.to_thread(backend.exists, key):
+            await asyncio.to_thread(backend.move, key, new_key)
+            moved = True
+        elif not await asyncio.to_thread(backend.exists, new_key):
+            missing.append(str(doc["_id"]))
+            continue
+        result = await collection.update_one(
+            {"_id": doc["_id"], "path": doc.get("path"), "url": doc.get("url")},
+            {"$set": {"path": new_key, "url": url_from_key(new_key)}}
+        )
+        if result.modified_count == 0:
+            # The document changed since it was read; put the file back.
+            if moved:
+                await asyncio.to_thread(backend.move, new_key, key)
+            skipped.append(str(doc["_id"]))
+            continue
+        migrated += 1
+    return {"migrated": migrated, "missing_files": missing, "skipped_documents": skipped}
+
+async def reconcile_storage(
+    db: Any,
+    *,
+    category: Optional[str] = None,
+    fix: bool = False,
+    backend: StorageBackend = storage,
+    grace_seconds: Optional[int] = None,
+    report_limit: Optional[int] = None
+) -> Dict[str, Any]:
+    collection = db[settings.IMAGES_COLLECTION]
+    if grace_seconds is None:
+        grace_seconds = settings.RECONCILE_GRACE_SECONDS
+    cutoff = time.time() - grace_seconds
+
+    # Documents are loaded before the scan: a file is always written before its
+    # document is inserted, so every loaded document's file is already on disk.
+    doc_keys, unresolved = await _load_document_keys(collection, category)
+    files = await asyncio.to_thread(_scan_storage, backend, category)
+
+    categories: Dict[str, Dict[str, int]] = {}
+    orphaned: List[Tuple[str, int]] = []
+    recent = 0
+    for key, (size, mtime) in files.items():
+        stats = categories.setdefault(
+            key.split("/", 1)[0],
+            {"files": 0, "bytes": 0, "orphaned_files": 0, "orphaned_bytes": 0}
+        )
+        stats["files"] += 1
+        stats["bytes"] += size
+        if key in doc_keys:
+            continue
+        if mtime > cutoff:
+            recent += 1
+            continue
+        stats["orphaned_files"] += 1
+        stats["orphaned_bytes"] += size
+        orphaned.append((key, size))
+
+    dangling = {key: ids for key, ids in doc_keys.items() if key not in files}
+    duplicates = {key: [str(i) for i in ids] for key, ids in doc_keys.items() if len(ids) > 1}
+
+    deleted_files = 0
+    deleted_documents = 0
+    if fix:
+        for key, _ in orphaned:
+            if await collection.find_one(_key_filter(key), {"_id": 1}):
+                continue
+            if await asyncio.to_thread(backend.delete, key):
+                deleted_files += 1
+        for key, ids in dangling.items():
+            if await asyncio.to_thread(backend.exists, key):
+                continue
+            result = await collection.delete_many({"_id": {"$in": ids}, **_key_filter(key)})
+            deleted_documents += result.deleted_count
+
+    orphaned_keys = [key for key, _ in orphaned]
+    dangling_ids = [str(i) for ids in dangling.values() for i in ids]
+    unresolved_ids = [str(i) for i in unresolved]
+    return {
+        "categories": categories,
+        "total_files": len(files),
+        "total_bytes": sum(size for size, _ in files.values()),
+        "recent_files_skipped": recent,
+        "orphaned_count": len(orphaned_keys),
+        "orphaned_files": orphaned_keys[:report_limit],
+        "orphaned_bytes": sum(size for _, size in orphaned),
+        "dangling_count": len(dangling_ids),
+        "dangling_documents": dangling_ids[:report_limit],
+        "duplicate_count": len(duplicates),
+        "duplicate_keys": dict(list(duplicates.items())[:report_limit]),
+        "unresolved_count": len(unresolved_ids),
+        "unresolved_documents": unresolved_ids[:report_limit],
+        "deleted_files": deleted_files,
+        "deleted_documents": deleted_documents,
+        "fixed": fix
+    }
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconcile stored image files with the images collection.")
+    parser.add_argument("--category", help="Only reconcile a single category")
+    parser.add_argument("--fix", action="store_true", help="Delete orphaned files and dangling documents")
+    parser.add_argument("--migrate", action="store_true", help="Move unsharded files into hashed sub-directories first")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    try:
+        db = client[settings.DB_NAME]
+        report: Dict[str, Any] = {}
+        if args.migrate:
+            report["migration"] = await migrate_storage(db, category=args.category)
+        report.update(await reconcile_storage(db, category=args.category, fix=args.fix))
+    finally:
+        client.close()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
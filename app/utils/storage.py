@@ -0,0 +1,91 @@
+from typing import Iterator, Optional, Tuple
+from abc import ABC, abstractmethod
+from app.config import settings
+from pathlib import Path
+import hashlib
+import os
+
+class StorageBackend(ABC):
+    @abstractmethod
+    def save(self, key: str, data: bytes) -> None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def move(self, src_key: str, dst_key: str) -> None: ...
+
+    @abstractmethod
+    def local_path(self, key: str) -> str: ...
+
+    @abstractmethod
+    def iter_files(self, category: Optional[str] = None) -> Iterator[Tuple[str, int, float]]: ...
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str) -> None:
+        self.root = Path(root)
+
+    def local_path(self, key: str) -> str:
+        return str(self.root / key.lstrip("/"))
+
+    def save(self, key: str, data: bytes) -> None:
+        file_path = Path(self.local_path(key))
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(data)
+
+    def delete(self, key: str) -> bool:
+        file_path = Path(self.local_path(key))
+        if not file_path.is_file():
+            return False
+        file_path.unlink()
+        return True
+
+    def exists(self, key: str) -> bool:
+        return Path(self.local_path(key)).is_file()
+
+    def move(self, src_key: str, dst_key: str) -> None:
+        dst_path = Path(self.local_path(dst_key))
+        dst_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self.local_path(src_key), dst_path)
+
+    def iter_files(self, category: Optional[str] = None) -> Iterator[Tuple[str, int, float]]:
+        base = self.root / category if category else self.root
+        if not base.is_dir():
+            return
+        for dirpath, _, filenames in os.walk(base):
+            for filename in filenames:
+                full_path = Path(dirpath) / filename
+                key = full_path.relative_to(self.root).as_posix()
+                if "/" not in key:
+                    continue
+                try:
+                    stat = full_path.stat()
+                except OSError:
+                    continue
+                yield key, stat.st_size, stat.st_mtime
+
+
+def shard_key(category: str, filename: str) -> str:
+    digest = hashlib.sha256(filename.encode("utf-8")).hexdigest()
+    shards = [digest[i * 2:i * 2 + 2] for i in range(settings.STORAGE_SHARD_DEPTH)]
+    return "/".join([category, *shards, filename])
+
+def key_from_url(url: str) -> str:
+    cdn_prefix = settings.CDN_DOMAIN.rstrip("/") + "/images"
+    if url.startswith(cdn_prefix):
+        url = url[len(cdn_prefix):]
+    return url.lstrip("/")
+
+def url_from_key(key: str) -> str:
+    return settings.CDN_DOMAIN.rstrip("/") + "/images/" + key.lstrip("/")
+
+def get_storage() -> StorageBackend:
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorage(settings.STATIC_IMAGES_DIR)
+    raise ValueError(f"Unsupported storage backend: {settings.STORAGE_BACKEND}")
+
+storage = get_storage()
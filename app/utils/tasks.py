@@ -0,0 +1,103 @@
+from app.utils.storage import storage, key_from_url, url_from_key
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.exceptions import NonRetryableJobException
+from app.utils.reconciler import reconcile_storage
+from app.utils.cdn import save_image_locally
+from fastapi import HTTPException
+from app.config import settings
+from bson import ObjectId
+import asyncio
+import time
+
+RECONCILE_REPORT_LIMIT = 100
+
+JobHandler = Callable[[Any, Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+_detector = None
+
+def get_detector():
+    global _detector
+    if _detector is None:
+        from nudenet import NudeDetector
+        _detector = NudeDetector()
+    return _detector
+
+def detect_nsfw(key: str) -> bool:
+    detections = get_detector().detect(storage.local_path(key))
+    return any(d.get("confidence", 0) > 0.5 for d in detections)
+
+async def process_image(db: Any, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    collection = db[settings.IMAGES_COLLECTION]
+    image_data: Dict[str, Any] = dict(payload.get("data") or {})
+    image_id = payload.get("image_id")
+
+    existing_image = None
+    if image_id:
+        existing_image = await collection.find_one({"_id": ObjectId(image_id)})
+        if not existing_image:
+            return {"detail": "Image no longer exists.", "image_id": image_id}
+
+    try:
+        local_url = await asyncio.to_thread(save_image_locally, payload["url"], payload["category"])
+    except HTTPException as e:
+        if 400 <= e.status_code < 500:
+            raise NonRetryableJobException(str(e.detail))
+        raise
+
+    try:
+        image_data["is_nsfw"] = await asyncio.to_thread(detect_nsfw, local_url)
+        image_data["path"] = local_url.lstrip("/")
+        image_data["url"] = url_from_key(local_url)
+
+        if existing_image:
+            result_db = await collection.update_one({"_id": existing_image["_id"]}, {"$set": image_data})
+            if result_db.matched_count == 0:
+                await asyncio.to_thread(storage.delete, local_url)
+                return {"detail": "Image no longer exists.", "image_id": image_id}
+        else:
+            result_db = await collection.insert_one(image_data)
+            image_id = str(result_db.inserted_id)
+    except Exception:
+        await asyncio.to_thread(storage.delete, local_url)
+        raise
+
+    if existing_image:
+        old_key = existing_image.get("path") or key_from_url(existing_image.get("url") or "")
+        if old_key and old_key != image_data["path"]:
+            try:
+                await asyncio.to_thread(storage.delete, old_key)
+            except Exception:
+                pass
+
+    return {"image_id": image_id, "url": image_data["url"], "is_nsfw": image_data["is_nsfw"]}
+
+async def delete_file(db: Any, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    deleted = await asyncio.to_thread(storage.delete, payload["key"])
+    return {"key": payload["key"], "deleted": deleted}
+
+async def reconcile(db: Any, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return await reconcile_storage(
+        db,
+        category=payload.get("category"),
+        fix=bool(payload.get("fix")),
+        report_limit=RECONCILE_REPORT_LIMIT
+    )
+
+async def recompute_stats(db: Any, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    total_users, total_images = await asyncio.gather(
+        db[settings.API_KEYS_COLLECTION].count_documents({}),
+        db[settings.IMAGES_COLLECTION].count_documents({})
+    )
+    await db["stats"].update_one(
+        {"_id": "global"},
+        {"$set": {"totalUsers": total_users, "totalImages": total_images, "statsUpdatedAt": time.time()}},
+        upsert=True
+    )
+    return {"totalUsers": total_users, "totalImages": total_images}
+
+handlers: Dict[str, JobHandler] = {
+    "process_image": process_image,
+    "delete_file": delete_file,
+    "reconcile_storage": reconcile,
+    "recompute_stats": recompute_stats,
+}
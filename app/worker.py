@@ -0,0 +1,65 @@
+from app.utils.jobs import (
+    promote_delayed_jobs, prune_expired_jobs, reap_dead_workers, register_worker,
+    release_worker_jobs, run_next_job
+)
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+import asyncio
+import logging
+import socket
+import uuid
+import os
+
+logger = logging.getLogger("nijiapi.worker")
+
+MAINTENANCE_INTERVAL = 30
+
+async def heartbeat(worker_id: str) -> None:
+    while True:
+        try:
+            await register_worker(worker_id)
+        except Exception as e:
+            logger.warning("Heartbeat failed: %s", e)
+        await asyncio.sleep(settings.JOB_HEARTBEAT_TTL / 3)
+
+async def maintenance() -> None:
+    while True:
+        try:
+            reaped = await reap_dead_workers()
+            if reaped:
+                logger.warning("Recovered %d job(s) from stopped workers", reaped)
+            await prune_expired_jobs()
+        except Exception as e:
+            logger.warning("Maintenance failed: %s", e)
+        await asyncio.sleep(MAINTENANCE_INTERVAL)
+
+async def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    db = client[settings.DB_NAME]
+    await register_worker(worker_id)
+    background = [asyncio.create_task(heartbeat(worker_id)), asyncio.create_task(maintenance())]
+    logger.info("Worker %s started", worker_id)
+    try:
+        while True:
+            try:
+                await promote_delayed_jobs()
+                job = await run_next_job(db, worker_id)
+            except Exception as e:
+                logger.exception("Worker loop error: %s", e)
+                await asyncio.sleep(settings.JOB_RETRY_BACKOFF)
+                continue
+            if job:
+                logger.info("Job %s (%s) -> %s", job["id"], job["type"], job["status"])
+    finally:
+        for task in background:
+            task.cancel()
+        try:
+            await release_worker_jobs(worker_id)
+        except Exception as e:
+            logger.warning("Could not release jobs of worker %s: %s", worker_id, e)
+        client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
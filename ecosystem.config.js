@@ -14,6 +14,20 @@ module.exports = {
       max_memory_restart: "4G",
       watch: false,
     },
+    {
+      name: "nijiapi-worker",
+      script: "bash",
+      args: [
+        "-c",
+        "venv/bin/python -m app.worker"
+      ],
+      interpreter: "none",
+      cwd: "/home/gonzyui/Niji-API",
+      exec_mode: "fork",
+      instances: 2,
+      max_memory_restart: "4G",
+      watch: false,
+    },
     {
       name: "redis",
       script: "redis-server",
@@ -0,0 +1,7 @@
+import os
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "nijiapi_test")
+os.environ.setdefault("IMAGES_COLLECTION", "images")
+os.environ.setdefault("API_KEYS_COLLECTION", "api_keys")
+os.environ.setdefault("CDN_DOMAIN", "https://cdn.example.com")
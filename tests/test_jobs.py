@@ -0,0 +1,222 @@
+from app.exceptions import NonRetryableJobException
+from app.config import settings
+from app.utils import jobs
+from redis.exceptions import RedisError
+import fakeredis.aioredis
+import asyncio
+import pytest
+import time
+
+WORKER = "worker-1"
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch):
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(jobs, "redis_client", client)
+    return client
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    async def ok(db, payload):
+        calls.append(payload)
+        return {"echo": payload}
+
+    async def flaky(db, payload):
+        calls.append(payload)
+        raise RuntimeError("temporary failure")
+
+    async def broken(db, payload):
+        calls.append(payload)
+        raise NonRetryableJobException("bad input")
+
+    monkeypatch.setitem(jobs.handlers, "ok", ok)
+    monkeypatch.setitem(jobs.handlers, "flaky", flaky)
+    monkeypatch.setitem(jobs.handlers, "broken", broken)
+    return calls
+
+async def test_enqueue_and_run_success(fake_redis, calls):
+    job = await jobs.enqueue("ok", {"n": 1})
+    assert job["status"] == "queued"
+
+    done = await jobs.run_next_job(None, WORKER, timeout=1)
+
+    assert done["status"] == "succeeded"
+    assert done["attempts"] == 1
+    assert done["result"] == {"echo": {"n": 1}}
+    assert calls == [{"n": 1}]
+    assert await fake_redis.llen(jobs._processing_key(WORKER)) == 0
+    stats = await jobs.get_queue_stats()
+    assert stats["queued"] == 0 and stats["running"] == 0
+    assert stats["avg_run_seconds"] is not None
+
+async def test_enqueue_rejects_unknown_type():
+    with pytest.raises(ValueError):
+        await jobs.enqueue("nope", {})
+
+async def test_enqueue_unique_for_deduplicates(calls):
+    assert await jobs.enqueue("ok", {}, unique_for=60) is not None
+    assert await jobs.enqueue("ok", {}, unique_for=60) is None
+
+async def test_failure_is_retried_with_backoff(fake_redis, calls, monkeypatch):
+    monkeypatch.setattr(settings, "JOB_RETRY_BACKOFF", 10)
+    job = await jobs.enqueue("flaky", {}, max_attempts=3)
+
+    before = time.time()
+    first = await jobs.run_next_job(None, WORKER, timeout=1)
+    assert first["status"] == "delayed"
+    assert first["error"] == "temporary failure"
+    assert before + 10 <= first["run_at"] <= time.time() + 10
+    assert await fake_redis.zscore(f"{jobs.STATUS_PREFIX}delayed", job["id"]) == pytest.approx(first["run_at"])
+    assert await fake_redis.llen(jobs.QUEUE_KEY) == 0
+
+    await fake_redis.zadd(f"{jobs.STATUS_PREFIX}delayed", {job["id"]: 0})
+    assert await jobs.promote_delayed_jobs() == 1
+
+    before = time.time()
+    second = await jobs.run_next_job(None, WORKER, timeout=1)
+    assert second["status"] == "delayed"
+    assert second["attempts"] == 2
+    assert second["run_at"] >= before + 20
+
+    await fake_redis.zadd(f"{jobs.STATUS_PREFIX}delayed", {job["id"]: 0})
+    await jobs.promote_delayed_jobs()
+    third = await jobs.run_next_job(None, WORKER, timeout=1)
+    assert third["status"] == "failed"
+    assert third["attempts"] == 3
+    assert len(calls) == 3
+    assert await fake_redis.ttl(jobs._job_key(job["id"])) > 0
+
+async def test_non_retryable_failure_fails_immediately(calls):
+    await jobs.enqueue("broken", {}, max_attempts=5)
+    done = await jobs.run_next_job(None, WORKER, timeout=1)
+    assert done["status"] == "failed"
+    assert done["error"] == "bad input"
+    assert done["attempts"] == 1
+
+async def test_promote_only_moves_due_jobs(fake_redis, calls):
+    due = await jobs.enqueue("ok", {})
+    later = await jobs.enqueue("ok", {})
+    await fake_redis.delete(jobs.QUEUE_KEY)
+    for job_id, run_at in ((due["id"], time.time() - 1), (later["id"], time.time() + 3600)):
+        await fake_redis.zrem(f"{jobs.STATUS_PREFIX}queued", job_id)
+        await fake_redis.zadd(f"{jobs.STATUS_PREFIX}delayed", {job_id: run_at})
+        await fake_redis.hset(jobs._job_key(job_id), "status", "delayed")
+
+    assert await jobs.promote_delayed_jobs() == 1
+
+    assert await fake_redis.lrange(jobs.QUEUE_KEY, 0, -1) == [due["id"]]
+    assert (await jobs.get_job(due["id"]))["status"] == "queued"
+    assert (await jobs.get_job(later["id"]))["status"] == "delayed"
+
+async def test_cancel_queued_job(fake_redis, calls):
+    job = await jobs.enqueue("ok", {})
+    assert await jobs.cancel_job(job["id"]) == "cancelled"
+
+    assert await fake_redis.llen(jobs.QUEUE_KEY) == 0
+    assert (await jobs.get_job(job["id"]))["status"] == "cancelled"
+    assert await jobs.run_next_job(None, WORKER, timeout=1) is None
+    assert calls == []
+
+async def test_cancel_delayed_job_is_not_promoted(fake_redis, calls):
+    job = await jobs.enqueue("flaky", {}, max_attempts=2)
+    await jobs.run_next_job(None, WORKER, timeout=1)
+
+    assert await jobs.cancel_job(job["id"]) == "cancelled"
+    await jobs.promote_delayed_jobs()
+
+    assert job["id"] not in await fake_redis.lrange(jobs.QUEUE_KEY, 0, -1)
+    assert (await jobs.get_job(job["id"]))["status"] == "cancelled"
+
+async def test_cancel_after_pop_before_claim_skips_job(fake_redis, calls):
+    job = await jobs.enqueue("ok", {})
+    await fake_redis.lmove(jobs.QUEUE_KEY, jobs._processing_key(WORKER), "RIGHT", "LEFT")
+    assert await jobs.cancel_job(job["id"]) == "cancelled"
+    await fake_redis.lpush(jobs.QUEUE_KEY, job["id"])
+
+    done = await jobs.run_next_job(None, WORKER, timeout=1)
+
+    assert done["status"] == "cancelled"
+    assert calls == []
+
+async def test_cancel_finished_job_is_rejected(calls):
+    job = await jobs.enqueue("ok", {})
+    await jobs.run_next_job(None, WORKER, timeout=1)
+    assert await jobs.cancel_job(job["id"]) == "succeeded"
+    assert await jobs.cancel_job("missing") is None
+
+async def test_reap_requeues_jobs_of_dead_worker(fake_redis, calls):
+    running = await jobs.enqueue("ok", {}, max_attempts=2)
+    popped = await jobs.enqueue("ok", {})
+    exhausted = await jobs.enqueue("ok", {}, max_attempts=1)
+    processing = jobs._processing_key(WORKER)
+    await jobs.register_worker(WORKER)
+    for job in (running, popped, exhausted):
+        await fake_redis.lmove(jobs.QUEUE_KEY, processing, "RIGHT", "LEFT")
+    for job in (running, exhausted):
+        await fake_redis.eval(jobs._CLAIM_SCRIPT, 1, processing, job["id"], time.time(), WORKER)
+
+    assert await jobs.reap_dead_workers() == 0
+    await fake_redis.delete(f"{jobs.HEARTBEAT_PREFIX}{WORKER}")
+    assert await jobs.reap_dead_workers() == 3
+
+    assert (await jobs.get_job(running["id"]))["status"] == "delayed"
+    assert (await jobs.get_job(exhausted["id"]))["status"] == "failed"
+    assert await fake_redis.lrange(jobs.QUEUE_KEY, 0, -1) == [popped["id"]]
+    assert not await fake_redis.exists(processing)
+    assert not await fake_redis.sismember(jobs.WORKERS_KEY, WORKER)
+    assert (await jobs.get_queue_stats())["running"] == 0
+
+async def test_list_jobs_filters_and_pages(calls):
+    created = [await jobs.enqueue("ok", {"n": n}) for n in range(3)]
+    await jobs.enqueue("flaky", {})
+    await jobs.cancel_job(created[0]["id"])
+
+    page = await jobs.list_jobs(job_type="ok", page=1, size=2)
+    assert page["total"] == 3
+    assert [j["id"] for j in page["items"]] == [created[2]["id"], created[1]["id"]]
+
+    queued_ok = await jobs.list_jobs(status="queued", job_type="ok")
+    assert {j["id"] for j in queued_ok["items"]} == {created[1]["id"], created[2]["id"]}
+
+    cancelled = await jobs.list_jobs(status="cancelled")
+    assert [j["id"] for j in cancelled["items"]] == [created[0]["id"]]
+
+    assert (await jobs.list_jobs())["total"] == 4
+
+async def test_list_jobs_rejects_unknown_filters(calls):
+    with pytest.raises(ValueError):
+        await jobs.list_jobs(status="nope")
+    with pytest.raises(ValueError):
+        await jobs.list_jobs(job_type="nope")
+
+async def test_interrupted_job_is_released(fake_redis, monkeypatch):
+    async def interrupted(db, payload):
+        raise asyncio.CancelledError()
+
+    monkeypatch.setitem(jobs.handlers, "interrupted", interrupted)
+    job = await jobs.enqueue("interrupted", {}, max_attempts=2)
+
+    with pytest.raises(asyncio.CancelledError):
+        await jobs.run_next_job(None, WORKER, timeout=1)
+
+    released = await jobs.get_job(job["id"])
+    assert released["status"] == "delayed"
+    assert not await fake_redis.exists(jobs._processing_key(WORKER))
+    assert (await jobs.get_queue_stats())["running"] == 0
+
+async def test_redis_error_after_claim_releases_job(fake_redis, calls, monkeypatch):
+    job = await jobs.enqueue("ok", {})
+    finish = jobs._finish
+
+    async def failing_finish(*args, **kwargs):
+        raise RedisError("connection lost")
+
+    monkeypatch.setattr(jobs, "_finish", failing_finish)
+    with pytest.raises(RedisError):
+        await jobs.run_next_job(None, WORKER, timeout=1)
+    monkeypatch.setattr(jobs, "_finish", finish)
+
+    assert (await jobs.get_job(job["id"]))["status"] == "delayed"
+    assert not await fake_redis.exists(jobs._processing_key(WORKER))
@@ -0,0 +1,210 @@
+from app.utils.storage import LocalStorage, StorageBackend, shard_key, key_from_url, url_from_key
+from app.utils.reconciler import migrate_storage, reconcile_storage
+from mongomock_motor import AsyncMongoMockClient
+from app.config import settings
+import pytest
+import time
+import os
+
+OLD = time.time() - 2 * 86400
+
+@pytest.fixture
+def backend(tmp_path):
+    return LocalStorage(str(tmp_path))
+
+@pytest.fixture
+def images():
+    return AsyncMongoMockClient()["nijiapi_test"][settings.IMAGES_COLLECTION]
+
+def as_db(collection):
+    return {settings.IMAGES_COLLECTION: collection}
+
+def save_old(backend, key, data=b"data"):
+    backend.save(key, data)
+    os.utime(backend.local_path(key), (OLD, OLD))
+
+def test_shard_key_fans_out_by_hash():
+    key = shard_key("waifu", "a.jpg")
+    category, first, second, filename = key.split("/")
+    assert (category, filename) == ("waifu", "a.jpg")
+    assert len(first) == len(second) == 2
+    assert shard_key("waifu", "a.jpg") == key
+    assert shard_key("waifu", "b.jpg") != key
+
+def test_url_round_trip():
+    key = "waifu/ab/cd/a.jpg"
+    assert key_from_url(url_from_key(key)) == key
+    assert key_from_url(f"/{key}") == key
+
+def test_storage_backend_is_abstract():
+    class Partial(StorageBackend):
+        def save(self, key, data):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
+
+def test_local_storage_operations(backend):
+    backend.save("waifu/ab/cd/a.jpg", b"abc")
+    assert backend.exists("waifu/ab/cd/a.jpg")
+    assert [(k, s) for k, s, _ in backend.iter_files("waifu")] == [("waifu/ab/cd/a.jpg", 3)]
+
+    backend.move("waifu/ab/cd/a.jpg", "waifu/ef/01/a.jpg")
+    assert not backend.exists("waifu/ab/cd/a.jpg")
+    assert backend.exists("waifu/ef/01/a.jpg")
+
+    assert backend.delete("waifu/ef/01/a.jpg")
+    assert not backend.delete("waifu/ef/01/a.jpg")
+
+def test_iter_files_skips_root_files(backend):
+    backend.save("favicon.ico", b"x")
+    backend.save("waifu/a.jpg", b"x")
+    assert [k for k, _, _ in backend.iter_files()] == ["waifu/a.jpg"]
+
+async def test_reconcile_resolves_every_url_form(backend, images):
+    for key in ("waifu/cdn.jpg", "waifu/bare.jpg", "waifu/ab/cd/new.jpg"):
+        save_old(backend, key)
+    await images.insert_one({"url": url_from_key("waifu/cdn.jpg")})
+    await images.insert_one({"url": "/waifu/bare.jpg"})
+    await images.insert_one({"path": "waifu/ab/cd/new.jpg", "url": url_from_key("waifu/ab/cd/new.jpg")})
+
+    report = await reconcile_storage(as_db(images), fix=True, backend=backend)
+
+    assert report["orphaned_files"] == []
+    assert report["dangling_documents"] == []
+    assert report["categories"]["waifu"]["files"] == 3
+    assert report["categories"]["waifu"]["bytes"] == 12
+    assert report["deleted_files"] == 0 and report["deleted_documents"] == 0
+
+async def test_reconcile_uses_storage_key_not_category(backend, images):
+    save_old(backend, "waifu/ab/cd/a.jpg")
+    await images.insert_one({"path": "waifu/ab/cd/a.jpg", "category": "husbando"})
+
+    old = await reconcile_storage(as_db(images), category="waifu", fix=True, backend=backend)
+    new = await reconcile_storage(as_db(images), category="husbando", fix=True, backend=backend)
+
+    assert old["orphaned_files"] == [] and new["dangling_documents"] == []
+    assert backend.exists("waifu/ab/cd/a.jpg")
+    assert await images.count_documents({}) == 1
+
+async def test_reconcile_fix_removes_orphans_and_dangling(backend, images):
+    save_old(backend, "waifu/ab/cd/orphan.jpg", b"12345")
+    await images.insert_one({"path": "waifu/ab/cd/gone.jpg"})
+
+    report = await reconcile_storage(as_db(images), fix=True, backend=backend)
+
+    assert report["orphaned_files"] == ["waifu/ab/cd/orphan.jpg"]
+    assert report["categories"]["waifu"]["orphaned_bytes"] == 5
+    assert report["deleted_files"] == 1 and report["deleted_documents"] == 1
+    assert not backend.exists("waifu/ab/cd/orphan.jpg")
+    assert await images.count_documents({}) == 0
+
+async def test_reconcile_skips_files_in_grace_window(backend, images):
+    backend.save("waifu/ab/cd/uploading.jpg", b"x")
+
+    report = await reconcile_storage(as_db(images), fix=True, backend=backend, grace_seconds=3600)
+
+    assert report["recent_files_skipped"] == 1
+    assert report["orphaned_files"] == []
+    assert backend.exists("waifu/ab/cd/uploading.jpg")
+
+class ChangingCollection:
+    """Delegates to a collection and runs ``change`` right before the first call of ``hook``."""
+
+    def __init__(self, collection, hook, change):
+        self.collection = collection
+        self.hook = hook
+        self.change = change
+
+    def __getattr__(self, name):
+        attr = getattr(self.collection, name)
+        if name != self.hook or self.change is None:
+            return attr
+
+        async def wrapper(*args, **kwargs):
+            change, self.change = self.change, None
+            await change()
+            return await attr(*args, **kwargs)
+        return wrapper
+
+async def test_reconcile_fix_rechecks_before_deleting(backend, images):
+    save_old(backend, "waifu/ab/cd/late.jpg")
+    await images.insert_one({"path": "waifu/ab/cd/restored.jpg"})
+    scan = backend.iter_files
+
+    def scan_then_restore(category=None):
+        files = list(scan(category))
+        save_old(backend, "waifu/ab/cd/restored.jpg")
+        return iter(files)
+
+    async def insert_late():
+        await images.insert_one({"url": "/waifu/ab/cd/late.jpg"})
+
+    backend.iter_files = scan_then_restore
+    collection = ChangingCollection(images, "find_one", insert_late)
+
+    report = await reconcile_storage(as_db(collection), fix=True, backend=backend)
+
+    assert report["orphaned_files"] == ["waifu/ab/cd/late.jpg"]
+    assert len(report["dangling_documents"]) == 1
+    assert report["deleted_files"] == 0 and report["deleted_documents"] == 0
+    assert backend.exists("waifu/ab/cd/late.jpg")
+    assert await images.count_documents({}) == 2
+
+async def test_reconcile_reports_duplicates_and_unresolved(backend, images):
+    save_old(backend, "waifu/ab/cd/a.jpg")
+    await images.insert_one({"path": "waifu/ab/cd/a.jpg"})
+    await images.insert_one({"path": "waifu/ab/cd/a.jpg"})
+    await images.insert_one({"category": "waifu"})
+
+    report = await reconcile_storage(as_db(images), fix=True, backend=backend)
+
+    assert list(report["duplicate_keys"]) == ["waifu/ab/cd/a.jpg"]
+    assert len(report["duplicate_keys"]["waifu/ab/cd/a.jpg"]) == 2
+    assert len(report["unresolved_documents"]) == 1
+    assert report["deleted_documents"] == 0
+    assert await images.count_documents({}) == 3
+
+async def test_migrate_then_fix_keeps_every_image(backend, images):
+    save_old(backend, "waifu/cdn.jpg")
+    save_old(backend, "waifu/bare.jpg")
+    save_old(backend, "waifu/unused.jpg")
+    cdn_id = (await images.insert_one({"url": url_from_key("waifu/cdn.jpg")})).inserted_id
+    bare_id = (await images.insert_one({"url": "/waifu/bare.jpg"})).inserted_id
+
+    migration = await migrate_storage(as_db(images), backend=backend)
+    report = await reconcile_storage(as_db(images), fix=True, backend=backend)
+
+    assert migration["migrated"] == 2
+    assert report["deleted_documents"] == 0
+    assert report["orphaned_files"] == ["waifu/unused.jpg"]
+    for doc_id, filename in ((cdn_id, "cdn.jpg"), (bare_id, "bare.jpg")):
+        doc = await images.find_one({"_id": doc_id})
+        assert doc["path"] == shard_key("waifu", filename)
+        assert doc["url"] == url_from_key(doc["path"])
+        assert backend.exists(doc["path"])
+        assert not backend.exists(f"waifu/{filename}")
+
+async def test_migrate_restores_file_when_document_changed(backend, images):
+    save_old(backend, "waifu/a.jpg")
+    doc_id = (await images.insert_one({"url": "/waifu/a.jpg"})).inserted_id
+
+    async def change_url():
+        await images.update_one({"_id": doc_id}, {"$set": {"url": "/waifu/other.jpg"}})
+
+    collection = ChangingCollection(images, "update_one", change_url)
+    migration = await migrate_storage(as_db(collection), backend=backend)
+
+    assert migration["migrated"] == 0
+    assert migration["skipped_documents"] == [str(doc_id)]
+    assert backend.exists("waifu/a.jpg")
+    assert not backend.exists(shard_key("waifu", "a.jpg"))
+
+async def test_reconcile_report_limit_caps_lists(backend, images):
+    for n in range(5):
+        save_old(backend, f"waifu/ab/cd/{n}.jpg")
+
+    report = await reconcile_storage(as_db(images), backend=backend, report_limit=2)
+
+    assert report["orphaned_count"] == 5
+    assert len(report["orphaned_files"]) == 2
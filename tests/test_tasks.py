@@ -0,0 +1,99 @@
+from app.exceptions import NonRetryableJobException
+from mongomock_motor import AsyncMongoMockClient
+from app.utils.storage import LocalStorage
+from app.utils import cdn, tasks
+from fastapi import HTTPException
+from app.config import settings
+import requests
+import pytest
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"img", content_type="image/png"):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {"Content-Type": content_type}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error", response=self)
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    backend = LocalStorage(str(tmp_path))
+    monkeypatch.setattr(cdn, "storage", backend)
+    monkeypatch.setattr(tasks, "storage", backend)
+    return backend
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["nijiapi_test"]
+
+@pytest.mark.parametrize("upstream, expected", [(404, 400), (403, 400), (503, 502)])
+def test_download_error_keeps_upstream_class(monkeypatch, upstream, expected):
+    monkeypatch.setattr(requests, "get", lambda url, timeout: FakeResponse(upstream))
+    with pytest.raises(HTTPException) as exc:
+        cdn.save_image_locally("https://example.com/a.png", "waifu")
+    assert exc.value.status_code == expected
+
+def test_download_connection_error_is_transient(monkeypatch):
+    def unreachable(url, timeout):
+        assert timeout == settings.DOWNLOAD_TIMEOUT
+        raise requests.ConnectionError("unreachable")
+
+    monkeypatch.setattr(requests, "get", unreachable)
+    with pytest.raises(HTTPException) as exc:
+        cdn.save_image_locally("https://example.com/a.png", "waifu")
+    assert exc.value.status_code == 502
+
+async def test_process_image_4xx_is_not_retried(backend, db, monkeypatch):
+    monkeypatch.setattr(requests, "get", lambda url, timeout: FakeResponse(404))
+    with pytest.raises(NonRetryableJobException):
+        await tasks.process_image(db, {"url": "https://example.com/a.png", "category": "waifu"})
+
+async def test_process_image_5xx_is_retried(backend, db, monkeypatch):
+    monkeypatch.setattr(requests, "get", lambda url, timeout: FakeResponse(500))
+    with pytest.raises(HTTPException):
+        await tasks.process_image(db, {"url": "https://example.com/a.png", "category": "waifu"})
+
+async def test_process_image_replaces_file(backend, db, monkeypatch):
+    monkeypatch.setattr(requests, "get", lambda url, timeout: FakeResponse(200))
+    monkeypatch.setattr(tasks, "detect_nsfw", lambda key: False)
+    backend.save("waifu/ab/cd/old.png", b"old")
+    images = db[settings.IMAGES_COLLECTION]
+    image_id = (await images.insert_one({"path": "waifu/ab/cd/old.png"})).inserted_id
+
+    result = await tasks.process_image(
+        db, {"url": "https://example.com/a.png", "category": "waifu", "image_id": str(image_id)}
+    )
+
+    doc = await images.find_one({"_id": image_id})
+    assert result["url"] == doc["url"]
+    assert backend.exists(doc["path"])
+    assert not backend.exists("waifu/ab/cd/old.png")
+
+class DeletingCollection:
+    """Delegates to a collection but deletes the image right before it is updated."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    async def update_one(self, filter, update, *args, **kwargs):
+        await self.collection.delete_one(filter)
+        return await self.collection.update_one(filter, update, *args, **kwargs)
+
+async def test_process_image_cleans_up_when_image_deleted_meanwhile(backend, db, monkeypatch):
+    images = db[settings.IMAGES_COLLECTION]
+    image_id = (await images.insert_one({"path": "waifu/ab/cd/old.png"})).inserted_id
+    monkeypatch.setattr(requests, "get", lambda url, timeout: FakeResponse(200))
+    monkeypatch.setattr(tasks, "detect_nsfw", lambda key: False)
+
+    result = await tasks.process_image(
+        {settings.IMAGES_COLLECTION: DeletingCollection(images)},
+        {"url": "https://example.com/a.png", "category": "waifu", "image_id": str(image_id)}
+    )
+
+    assert result["detail"] == "Image no longer exists."
+    assert list(backend.iter_files()) == []